@@ -6,19 +6,30 @@ and exporting structured results to Excel.
 """
 
 import streamlit as st
+import asyncio
 import os
 import json
 import pathlib
-from typing import List, Dict, Any
+import tempfile
+import time
+from typing import Iterator, List, Dict, Any
 from dotenv import load_dotenv
 
-from gemini_client import GeminiPDFAnalyzer, validate_api_key
+try:
+    import orjson  # Optional: faster JSON serialization
+except ImportError:
+    orjson = None
+
+from gemini_client import GeminiPDFAnalyzer, clear_response_cache, validate_api_key
 from prompt_builder import build_analysis_prompt, get_default_prompt
 from excel_export import create_excel_file, format_results_for_export
 
 # Load environment variables
 load_dotenv()
 
+# Minimum seconds between live progress updates sent to the browser
+STATUS_UPDATE_INTERVAL = 0.1
+
 # Page configuration
 st.set_page_config(
     page_title="PDF Analyzer with Gemini",
@@ -27,6 +38,41 @@ st.set_page_config(
 )
 
 
+@st.cache_resource(max_entries=1)
+def get_analyzer(
+    api_key: str,
+    model: str,
+    max_retries: int,
+    requests_per_minute: int,
+    max_concurrency: int
+) -> GeminiPDFAnalyzer:
+    """
+    Return a GeminiPDFAnalyzer shared across reruns and sessions.
+
+    A new analyzer is only built when one of the settings changes, so
+    the Gemini client's HTTPS connections and the rate limiter's quota
+    window carry over between batches. Only the most recent analyzer
+    is kept.
+
+    Args:
+        api_key: Google Gemini API key
+        model: Model identifier
+        max_retries: Maximum number of retry attempts for failed requests
+        requests_per_minute: Request quota per minute
+        max_concurrency: Upper bound on requests in flight at once
+
+    Returns:
+        Cached GeminiPDFAnalyzer instance
+    """
+    return GeminiPDFAnalyzer(
+        api_key=api_key,
+        model=model,
+        max_retries=max_retries,
+        requests_per_minute=requests_per_minute,
+        max_concurrency=max_concurrency
+    )
+
+
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
     if 'columns' not in st.session_state:
@@ -66,7 +112,10 @@ def save_template():
         "columns": [col for col in st.session_state.columns if col != "Document Name"]
     }
 
-    template_json = json.dumps(template, indent=2)
+    if orjson is not None:
+        template_json = orjson.dumps(template, option=orjson.OPT_INDENT_2).decode()
+    else:
+        template_json = json.dumps(template, indent=2)
     st.download_button(
         label="💾 Download Template",
         data=template_json,
@@ -94,13 +143,15 @@ def collect_pdfs_from_folder(folder_path: str) -> List[tuple]:
     """
     Recursively find all PDF files in a folder.
 
+    Files are not read here; analysis reads each one from disk when
+    it is processed.
+
     Args:
         folder_path: Path to folder
 
     Returns:
-        List of tuples (file_path, filename, file_bytes)
+        List of tuples (file_path, filename)
     """
-    pdf_files = []
     path = pathlib.Path(folder_path)
 
     if not path.exists():
@@ -111,34 +162,106 @@ def collect_pdfs_from_folder(folder_path: str) -> List[tuple]:
         st.error(f"Path is not a directory: {folder_path}")
         return []
 
-    for pdf_path in path.rglob("*.pdf"):
+    return list(_iter_pdfs(str(path)))
+
+
+def _iter_pdfs(root: str) -> Iterator[tuple]:
+    """
+    Walk a directory tree with os.scandir and yield PDF files.
+
+    DirEntry caches file type information from the directory listing,
+    avoiding a stat call per entry. Symlinked directories are not
+    followed and unreadable directories are skipped.
+
+    Args:
+        root: Directory to search
+
+    Yields:
+        Tuples (file_path, filename)
+    """
+    stack = [root]
+
+    while stack:
+        directory = stack.pop()
         try:
-            with open(pdf_path, 'rb') as f:
-                pdf_bytes = f.read()
-                pdf_files.append((str(pdf_path), pdf_path.name, pdf_bytes))
-        except Exception as e:
-            st.warning(f"Could not read {pdf_path.name}: {str(e)}")
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                        yield entry.path, entry.name
+        except OSError:
+            continue  # Skip directories we cannot read
+
+
+def spool_uploaded_pdfs(uploaded_files) -> List[tuple]:
+    """
+    Write uploaded PDFs to temporary files on disk for analysis.
+
+    The caller must pass the result to remove_spooled_pdfs once the
+    batch is done.
+
+    Args:
+        uploaded_files: List of Streamlit UploadedFile objects
+
+    Returns:
+        List of tuples (file_path, filename)
+    """
+    pdf_files = []
+
+    try:
+        for uploaded_file in uploaded_files:
+            with tempfile.NamedTemporaryFile(
+                mode='wb',
+                suffix=".pdf",
+                delete=False
+            ) as temp_file:
+                pdf_files.append((temp_file.name, uploaded_file.name))
+                # Write straight from the upload's buffer without copying it
+                temp_file.write(uploaded_file.getbuffer())
+    except BaseException:
+        remove_spooled_pdfs(pdf_files)
+        raise
 
     return pdf_files
 
 
+def remove_spooled_pdfs(pdf_files: List[tuple]) -> None:
+    """
+    Delete temporary files created by spool_uploaded_pdfs.
+
+    Args:
+        pdf_files: List of tuples (file_path, filename)
+    """
+    for file_path, _ in pdf_files:
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass  # Ignore cleanup errors
+
+
 def analyze_pdfs(
     pdf_files: List[tuple],
     analyzer: GeminiPDFAnalyzer,
     prompt_text: str,
-    column_names: List[str]
+    column_names: List[str],
+    max_concurrency: int = 8
 ):
     """
     Analyze multiple PDF files and update results in session state.
 
+    Files are analyzed concurrently, with at most max_concurrency
+    requests in flight at once. Results keep the input file order.
+
     Args:
-        pdf_files: List of tuples (file_path, filename, file_bytes)
+        pdf_files: List of tuples (file_path, filename)
         analyzer: GeminiPDFAnalyzer instance
         prompt_text: User's analysis prompt
         column_names: List of output column names
+        max_concurrency: Maximum number of PDFs analyzed at the same time
     """
     # Build the complete prompt
-    full_prompt = build_analysis_prompt(prompt_text, column_names)
+    full_prompt = build_analysis_prompt(prompt_text, tuple(column_names))
 
     # Reset results
     st.session_state.results = []
@@ -147,43 +270,110 @@ def analyze_pdfs(
 
     # Progress tracking
     progress_bar = st.progress(0)
-    status_container = st.container()
-
-    for idx, (file_path, filename, pdf_bytes) in enumerate(pdf_files):
-        # Update progress
-        progress = (idx) / len(pdf_files)
-        progress_bar.progress(progress)
-
-        # Show current file being processed
-        with status_container:
-            st.info(f"⏳ Processing: {filename}")
-
-        # Analyze PDF
-        success, result_dict, error_msg = analyzer.analyze_pdf(
-            pdf_bytes=pdf_bytes,
-            filename=filename,
-            prompt=full_prompt
-        )
-
-        # Store results
+    status_slot = st.empty()
+
+    outcomes = analyzer.run(_run_analysis_batch(
+        pdf_files=pdf_files,
+        analyzer=analyzer,
+        full_prompt=full_prompt,
+        column_names=column_names,
+        max_concurrency=max_concurrency,
+        progress_bar=progress_bar,
+        status_slot=status_slot
+    ))
+
+    # Store results in original file order
+    for (_, filename), (success, result_dict, error_msg) in zip(pdf_files, outcomes):
         st.session_state.filenames.append(filename)
 
         if success:
             st.session_state.results.append(result_dict)
             st.session_state.processing_status.append(("✅", "Success"))
-            with status_container:
-                st.success(f"✅ Completed: {filename}")
         else:
             st.session_state.results.append({"Error": error_msg})
             st.session_state.processing_status.append(("❌", error_msg))
-            with status_container:
-                st.error(f"❌ Failed: {filename} - {error_msg}")
 
     # Complete progress
     progress_bar.progress(1.0)
+    status_slot.empty()
     st.success(f"Analysis complete! Processed {len(pdf_files)} files.")
 
 
+async def _run_analysis_batch(
+    pdf_files: List[tuple],
+    analyzer: GeminiPDFAnalyzer,
+    full_prompt: str,
+    column_names: List[str],
+    max_concurrency: int,
+    progress_bar,
+    status_slot
+) -> List[tuple]:
+    """
+    Run analyze_pdf_async over all files behind a bounded semaphore.
+
+    Files with identical content share one API call inside the analyzer.
+    Live progress goes to a single placeholder and
+    is throttled to one update per STATUS_UPDATE_INTERVAL, so concurrent
+    files don't flood the browser with elements.
+
+    Args:
+        pdf_files: List of tuples (file_path, filename)
+        analyzer: GeminiPDFAnalyzer instance
+        full_prompt: Complete prompt sent with each PDF
+        column_names: List of output column names
+        max_concurrency: Maximum number of PDFs analyzed at the same time
+        progress_bar: Streamlit progress bar to update
+        status_slot: Streamlit placeholder for the live status line
+
+    Returns:
+        List of (success, result_dict, error_message) tuples in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    total = len(pdf_files)
+    completed = 0
+    last_update = 0.0
+
+    def update_status(message: str, force: bool = False):
+        nonlocal last_update
+        now = time.monotonic()
+        if force or now - last_update >= STATUS_UPDATE_INTERVAL:
+            progress_bar.progress(completed / max(total, 1))
+            status_slot.markdown(f"⏳ Processing {completed}/{total}: {message}")
+            last_update = now
+
+    def show_stream_progress(filename: str, received_chars: int):
+        update_status(f"receiving {filename} ({received_chars:,} characters)")
+
+    async def analyze_one(idx: int, file_path: str, filename: str):
+        async with semaphore:
+            outcome = await analyzer.analyze_pdf_async(
+                pdf_path=file_path,
+                filename=filename,
+                prompt=full_prompt,
+                column_names=column_names,
+                on_progress=lambda chars: show_stream_progress(filename, chars)
+            )
+        return idx, filename, outcome
+
+    tasks = [
+        analyze_one(idx, file_path, filename)
+        for idx, (file_path, filename) in enumerate(pdf_files)
+    ]
+    outcomes = [None] * total
+
+    update_status(f"up to {max_concurrency} files at a time", force=True)
+
+    for next_done in asyncio.as_completed(tasks):
+        idx, filename, outcome = await next_done
+        outcomes[idx] = outcome
+        completed += 1
+
+        # Always show the last file so the final count is accurate
+        update_status(f"finished {filename}", force=completed == total)
+
+    return outcomes
+
+
 def main():
     """Main application logic."""
     initialize_session_state()
@@ -211,14 +401,13 @@ def main():
             help="gemini-2.5-flash is faster and cheaper, gemini-3-pro-preview is more capable"
         )
 
-        # API delay
-        api_delay = st.slider(
-            "API Delay (seconds)",
-            min_value=0.0,
-            max_value=5.0,
-            value=1.0,
-            step=0.5,
-            help="Delay between API requests to avoid rate limiting"
+        # Request quota
+        requests_per_minute = st.number_input(
+            "Requests Per Minute",
+            min_value=1,
+            max_value=2000,
+            value=60,
+            help="Request quota of your API key; requests are paced to stay under it"
         )
 
         # Max retries
@@ -230,6 +419,15 @@ def main():
             help="Number of retry attempts for failed requests"
         )
 
+        # Max concurrency
+        max_concurrency = st.number_input(
+            "Max Concurrent Requests",
+            min_value=1,
+            max_value=32,
+            value=8,
+            help="Number of PDFs analyzed in parallel"
+        )
+
         st.divider()
 
         # Template management
@@ -319,6 +517,7 @@ def main():
         )
 
         pdf_files = []
+        uploaded_files = []
 
         if input_method == "Upload Files":
             uploaded_files = st.file_uploader(
@@ -326,14 +525,10 @@ def main():
                 type=['pdf'],
                 accept_multiple_files=True,
                 help="Select one or more PDF files to analyze"
-            )
+            ) or []
 
             if uploaded_files:
-                for uploaded_file in uploaded_files:
-                    pdf_bytes = uploaded_file.read()
-                    pdf_files.append((None, uploaded_file.name, pdf_bytes))
-
-                st.success(f"✅ {len(pdf_files)} file(s) uploaded")
+                st.success(f"✅ {len(uploaded_files)} file(s) uploaded")
 
         else:  # Folder Path
             folder_path = st.text_input(
@@ -350,7 +545,7 @@ def main():
                     if pdf_files:
                         st.success(f"✅ Found {len(pdf_files)} PDF file(s)")
                         with st.expander("View files"):
-                            for _, filename, _ in pdf_files:
+                            for _, filename in pdf_files:
                                 st.text(f"• {filename}")
                     else:
                         st.warning("No PDF files found in the specified folder")
@@ -358,7 +553,7 @@ def main():
         st.divider()
 
         # Analyze button
-        if pdf_files:
+        if pdf_files or uploaded_files:
             # Validation
             custom_columns = [col for col in st.session_state.columns if col != "Document Name"]
             if not custom_columns:
@@ -367,22 +562,30 @@ def main():
                 st.warning("⚠️ Enter an analysis prompt in the Configure tab before analyzing")
             else:
                 if st.button("🚀 Start Analysis", type="primary", use_container_width=True):
-                    # Create analyzer
-                    analyzer = GeminiPDFAnalyzer(
+                    # Reuse the analyzer (and its connections) across runs
+                    analyzer = get_analyzer(
                         api_key=api_key,
                         model=model,
                         max_retries=max_retries,
-                        api_delay=api_delay
+                        requests_per_minute=requests_per_minute,
+                        max_concurrency=max_concurrency
                     )
 
+                    # Spool uploads to disk only for the duration of the batch
+                    spooled_files = spool_uploaded_pdfs(uploaded_files)
+
                     # Run analysis
-                    with st.spinner("Analyzing PDFs..."):
-                        analyze_pdfs(
-                            pdf_files=pdf_files,
-                            analyzer=analyzer,
-                            prompt_text=st.session_state.prompt_text,
-                            column_names=st.session_state.columns
-                        )
+                    try:
+                        with st.spinner("Analyzing PDFs..."):
+                            analyze_pdfs(
+                                pdf_files=pdf_files + spooled_files,
+                                analyzer=analyzer,
+                                prompt_text=st.session_state.prompt_text,
+                                column_names=st.session_state.columns,
+                                max_concurrency=max_concurrency
+                            )
+                    finally:
+                        remove_spooled_pdfs(spooled_files)
 
                     # Switch to results tab
                     st.rerun()
@@ -408,14 +611,17 @@ def main():
 
             # Processing status summary
             st.subheader("Processing Status")
-            for filename, (status_icon, status_msg) in zip(
-                st.session_state.filenames,
-                st.session_state.processing_status
-            ):
-                if status_icon == "✅":
-                    st.success(f"{status_icon} {filename}: {status_msg}")
-                else:
-                    st.error(f"{status_icon} {filename}: {status_msg}")
+            st.dataframe(
+                [
+                    {"Document Name": filename, "Status": status_icon, "Message": status_msg}
+                    for filename, (status_icon, status_msg) in zip(
+                        st.session_state.filenames,
+                        st.session_state.processing_status
+                    )
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
 
             st.divider()
 
@@ -439,12 +645,21 @@ def main():
             except Exception as e:
                 st.error(f"Error creating Excel file: {str(e)}")
 
+            clear_col1, clear_col2 = st.columns(2)
+
             # Clear results button
-            if st.button("🗑️ Clear Results"):
-                st.session_state.results = []
-                st.session_state.filenames = []
-                st.session_state.processing_status = []
-                st.rerun()
+            with clear_col1:
+                if st.button("🗑️ Clear Results"):
+                    st.session_state.results = []
+                    st.session_state.filenames = []
+                    st.session_state.processing_status = []
+                    st.rerun()
+
+            # Clear cached responses so the next run re-analyzes every PDF
+            with clear_col2:
+                if st.button("♻️ Clear Cache", help="Forget cached Gemini responses"):
+                    clear_response_cache()
+                    st.success("Response cache cleared")
 
         else:
             st.info("No results yet. Configure your analysis and upload PDFs in the other tabs.")
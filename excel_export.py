@@ -2,33 +2,64 @@
 Excel export module for PDF analysis results.
 
 Creates formatted Excel files with auto-sized columns and styled headers.
+Workbooks are built in openpyxl's write-only mode, which streams rows
+into the XLSX file instead of keeping a Cell object for every value.
+Very large exports use xlsxwriter's constant_memory mode instead, which
+flushes each row to disk as soon as it is written.
 """
 
 from typing import List, Dict, Any
 import io
+import zipfile
+import pandas as pd
+import xlsxwriter
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
+from openpyxl.writer.excel import ExcelWriter
+
+
+# Above this many rows, column widths come from headers only
+AUTO_SIZE_MAX_ROWS = 500
+
+# Above this many rows, export with xlsxwriter in constant_memory mode
+CONSTANT_MEMORY_MIN_ROWS = 2000
+
+# DEFLATE level for the XLSX archive; level 1 is several times faster
+# than the default at a modest size cost
+EXCEL_COMPRESS_LEVEL = 1
+
+# Shared cell styles, created once and reused for every cell
+_HEADER_FONT = Font(bold=True, size=11)
+_HEADER_FILL = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
+_HEADER_ALIGNMENT = Alignment(horizontal="left", vertical="center")
+_DATA_ALIGNMENT = Alignment(vertical="top", wrap_text=True)
 
 
 def create_excel_file(
-    results: List[Dict[str, Any]],
+    results: pd.DataFrame,
     column_names: List[str]
 ) -> bytes:
     """
     Create an Excel file from analysis results.
 
     Args:
-        results: List of result dictionaries, each containing analysis data
+        results: DataFrame from format_results_for_export, one row per PDF
         column_names: Ordered list of column names (including "Document Name")
 
     Returns:
         Excel file content as bytes
     """
-    # Create workbook and active sheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "PDF Analysis Results"
+    if len(results) > CONSTANT_MEMORY_MIN_ROWS:
+        return _create_excel_file_constant_memory(results, column_names)
+
+    # Create write-only workbook and sheet
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("PDF Analysis Results")
+
+    # Auto-size columns (write-only sheets need widths before any rows)
+    _auto_size_columns(ws, column_names, results)
 
     # Write headers
     _write_headers(ws, column_names)
@@ -36,13 +67,82 @@ def create_excel_file(
     # Write data rows
     _write_data_rows(ws, results, column_names)
 
-    # Auto-size columns
-    _auto_size_columns(ws, column_names, results)
-
     # Save to bytes
+    return _save_workbook(wb)
+
+
+def _create_excel_file_constant_memory(
+    results: pd.DataFrame,
+    column_names: List[str]
+) -> bytes:
+    """
+    Create an Excel file with xlsxwriter, keeping memory flat in row count.
+
+    Rows are flushed to a temporary file as they are written. The
+    in_memory option is not used because it disables constant_memory.
+
+    Args:
+        results: DataFrame from format_results_for_export, one row per PDF
+        column_names: Ordered list of column names (including "Document Name")
+
+    Returns:
+        Excel file content as bytes
+    """
     excel_bytes = io.BytesIO()
-    wb.save(excel_bytes)
-    excel_bytes.seek(0)
+
+    # Plain strings, matching the openpyxl output (no auto-hyperlinks)
+    wb = xlsxwriter.Workbook(
+        excel_bytes,
+        {'constant_memory': True, 'strings_to_urls': False}
+    )
+    ws = wb.add_worksheet("PDF Analysis Results")
+
+    # Formats are shared by every cell, like the openpyxl styles above
+    header_format = wb.add_format({
+        'bold': True,
+        'font_size': 11,
+        'bg_color': '#D3D3D3',
+        'align': 'left',
+        'valign': 'vcenter'
+    })
+    data_format = wb.add_format({'valign': 'top', 'text_wrap': True})
+
+    for col_idx, width in enumerate(_column_widths(column_names, results)):
+        ws.set_column(col_idx, col_idx, width)
+
+    ws.write_row(0, 0, column_names, header_format)
+
+    rows = results[column_names].itertuples(index=False, name=None)
+    for row_idx, row in enumerate(rows, start=1):
+        ws.write_row(row_idx, 0, row, data_format)
+
+    wb.close()
+    return excel_bytes.getvalue()
+
+
+def _save_workbook(wb: Workbook) -> bytes:
+    """
+    Save a workbook to bytes using fast ZIP compression.
+
+    Equivalent to wb.save, but opens the archive with
+    EXCEL_COMPRESS_LEVEL instead of zlib's default level.
+
+    Args:
+        wb: openpyxl workbook
+
+    Returns:
+        Excel file content as bytes
+    """
+    excel_bytes = io.BytesIO()
+
+    with zipfile.ZipFile(
+        excel_bytes,
+        'w',
+        compression=zipfile.ZIP_DEFLATED,
+        compresslevel=EXCEL_COMPRESS_LEVEL,
+        allowZip64=True
+    ) as archive:
+        ExcelWriter(wb, archive).save()
 
     return excel_bytes.getvalue()
 
@@ -52,80 +152,104 @@ def _write_headers(ws, column_names: List[str]) -> None:
     Write and style header row.
 
     Args:
-        ws: openpyxl worksheet
+        ws: openpyxl write-only worksheet
         column_names: List of column names
     """
-    # Header styling
-    header_font = Font(bold=True, size=11)
-    header_fill = PatternFill(start_color="D3D3D3", end_color="D3D3D3", fill_type="solid")
-    header_alignment = Alignment(horizontal="left", vertical="center")
+    header_cells = []
+    for col_name in column_names:
+        cell = WriteOnlyCell(ws, value=col_name)
+        cell.font = _HEADER_FONT
+        cell.fill = _HEADER_FILL
+        cell.alignment = _HEADER_ALIGNMENT
+        header_cells.append(cell)
 
-    for col_idx, col_name in enumerate(column_names, start=1):
-        cell = ws.cell(row=1, column=col_idx)
-        cell.value = col_name
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
+    ws.append(header_cells)
 
 
 def _write_data_rows(
     ws,
-    results: List[Dict[str, Any]],
+    results: pd.DataFrame,
     column_names: List[str]
 ) -> None:
     """
     Write data rows to worksheet.
 
     Args:
-        ws: openpyxl worksheet
-        results: List of result dictionaries
+        ws: openpyxl write-only worksheet
+        results: DataFrame with columns in column_names order
         column_names: Ordered list of column names
     """
-    for row_idx, result_dict in enumerate(results, start=2):
-        for col_idx, col_name in enumerate(column_names, start=1):
-            cell = ws.cell(row=row_idx, column=col_idx)
-            cell.value = result_dict.get(col_name, "")
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
+    for row in results[column_names].itertuples(index=False, name=None):
+        row_cells = []
+        for value in row:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.alignment = _DATA_ALIGNMENT
+            row_cells.append(cell)
+        ws.append(row_cells)
 
 
 def _auto_size_columns(
     ws,
     column_names: List[str],
-    results: List[Dict[str, Any]]
+    results: pd.DataFrame
 ) -> None:
     """
     Auto-size columns based on content width.
 
     Args:
-        ws: openpyxl worksheet
+        ws: openpyxl worksheet (write-only sheets must not have rows yet)
         column_names: List of column names
-        results: List of result dictionaries
+        results: DataFrame of result rows
     """
-    for col_idx, col_name in enumerate(column_names, start=1):
-        # Calculate max width needed
-        max_width = len(col_name) + 2  # Start with header width
-
-        # Check data rows
-        for result_dict in results:
-            value = str(result_dict.get(col_name, ""))
-            # Handle multi-line content
-            lines = value.split('\n')
-            max_line_length = max(len(line) for line in lines) if lines else 0
-            max_width = max(max_width, max_line_length + 2)
-
-        # Cap maximum width at 50 for readability
-        max_width = min(max_width, 50)
+    widths = _column_widths(column_names, results)
 
+    for col_idx, width in enumerate(widths, start=1):
         # Set column width
         column_letter = get_column_letter(col_idx)
-        ws.column_dimensions[column_letter].width = max_width
+        ws.column_dimensions[column_letter].width = width
+
+
+def _column_widths(
+    column_names: List[str],
+    results: pd.DataFrame
+) -> List[int]:
+    """
+    Compute column widths that fit the header and content.
+
+    Content is only scanned for up to AUTO_SIZE_MAX_ROWS rows; larger
+    exports size columns to their headers.
+
+    Args:
+        column_names: List of column names
+        results: DataFrame of result rows
+
+    Returns:
+        Width for each column, in column_names order
+    """
+    # Longest line per column in one vectorized pass over all cells
+    if results.empty or len(results) > AUTO_SIZE_MAX_ROWS:
+        content_widths = [0] * len(column_names)
+    else:
+        content_widths = (
+            results[column_names]
+            .astype(str)
+            .apply(lambda col: col.str.split("\n").explode().str.len().max())
+            .fillna(0)
+            .astype(int)
+        )
+
+    # Fit header and content, capped at 50 for readability
+    return [
+        min(max(len(col_name), int(content_width)) + 2, 50)
+        for col_name, content_width in zip(column_names, content_widths)
+    ]
 
 
 def format_results_for_export(
     results: List[Dict[str, Any]],
     filenames: List[str],
     column_names: List[str]
-) -> List[Dict[str, Any]]:
+) -> pd.DataFrame:
     """
     Format analysis results for Excel export by adding document names
     and ensuring all columns are present.
@@ -136,18 +260,10 @@ def format_results_for_export(
         column_names: All column names including "Document Name"
 
     Returns:
-        Formatted list of dictionaries ready for Excel export
+        DataFrame with one row per PDF and columns in column_names order
     """
-    formatted_results = []
-
-    for filename, result_dict in zip(filenames, results):
-        formatted_row = {"Document Name": filename}
-
-        # Add all other columns
-        for col_name in column_names:
-            if col_name != "Document Name":
-                formatted_row[col_name] = result_dict.get(col_name, "")
-
-        formatted_results.append(formatted_row)
+    formatted_results = pd.DataFrame(results)
+    formatted_results["Document Name"] = filenames
 
-    return formatted_results
+    # Add missing columns, drop extra keys and blank out missing values
+    return formatted_results.reindex(columns=column_names).fillna("")
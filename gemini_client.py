@@ -1,18 +1,61 @@
 """
 Gemini API client module for PDF analysis.
 
-Handles PDF upload, content generation, and response parsing
+Handles PDF submission, content generation, and response parsing
 with retry logic and error handling.
 """
 
+import asyncio
+import atexit
+import hashlib
 import json
 import os
+import random
 import re
-import time
-import tempfile
-import pathlib
-from typing import Dict, Any, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple, TypeVar
+import diskcache
 from google import genai
+from google.genai import types
+
+try:
+    import orjson  # Optional: faster JSON parsing
+except ImportError:
+    orjson = None
+
+from prompt_builder import get_output_columns
+from rate_limiter import (
+    RateLimiter,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_TOKENS_PER_MINUTE,
+    DEFAULT_MAX_CONCURRENCY
+)
+
+
+PDF_MIME_TYPE = "application/pdf"
+
+# On-disk cache of parsed responses, keyed by PDF content, prompt and model
+CACHE_DIR = ".cache/gemini"
+
+# PDFs above this size go through the Files API instead of inline bytes,
+# keeping the whole request under Gemini's 20 MB inline limit
+INLINE_PDF_MAX_BYTES = 18 * 1024 * 1024
+
+# Chunk size for hashing PDFs that are too large to read whole (1 MB)
+PDF_SCAN_CHUNK_SIZE = 1 << 20
+
+# Gemini bills each PDF page as a fixed number of input tokens
+TOKENS_PER_PDF_PAGE = 258
+
+# Base and cap (seconds) for jittered exponential backoff between retries
+RETRY_BACKOFF_BASE = 2.0
+RETRY_BACKOFF_MAX = 60.0
+
+_T = TypeVar("_T")
+
+_PDF_PAGE_PATTERN = re.compile(rb"/Type\s*/Page\b")
+_RETRY_DELAY_PATTERN = re.compile(r"([\d.]+)s")
 
 
 class GeminiPDFAnalyzer:
@@ -23,7 +66,10 @@ class GeminiPDFAnalyzer:
         api_key: str,
         model: str = "gemini-3-pro-preview",
         max_retries: int = 2,
-        api_delay: float = 1.0
+        requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        cache_dir: str = CACHE_DIR
     ):
         """
         Initialize the Gemini PDF analyzer.
@@ -32,26 +78,90 @@ class GeminiPDFAnalyzer:
             api_key: Google Gemini API key
             model: Model identifier (default: gemini-3-pro-preview)
             max_retries: Maximum number of retry attempts for failed requests
-            api_delay: Delay in seconds between API calls
+            requests_per_minute: Request quota per minute
+            tokens_per_minute: Input token quota per minute
+            max_concurrency: Upper bound on requests in flight at once
+            cache_dir: Directory of the response cache
         """
         self.client = genai.Client(api_key=api_key)
         self.model = model
         self.max_retries = max_retries
-        self.api_delay = api_delay
+        self.limiter = RateLimiter(
+            requests_per_minute=requests_per_minute,
+            tokens_per_minute=tokens_per_minute,
+            max_concurrency=max_concurrency
+        )
+        self.cache = diskcache.Cache(cache_dir)
+
+        # Files API deletes run off the critical path; wait for pending
+        # ones at interpreter exit
+        self._delete_executor = ThreadPoolExecutor(max_workers=4)
+        atexit.register(self._delete_executor.shutdown, wait=True)
+
+        # The async client's connections are bound to the event loop that
+        # opened them, so all async work runs on one long-lived loop
+        self._loop = asyncio.new_event_loop()
+        self._loop_lock = threading.Lock()
+
+        # Outcomes of analyses still running, by cache key, so identical
+        # PDFs in the same batch share one API call
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def run(self, coroutine: Awaitable[_T]) -> _T:
+        """
+        Run a coroutine to completion on the analyzer's event loop.
+
+        Reusing one loop keeps the async client's connection pool warm
+        across batches. Calls from different threads are serialized.
+        If the run is interrupted (including by BaseException subclasses
+        such as Streamlit's rerun signal), every task left on the loop is
+        cancelled before re-raising, as asyncio.run does.
+
+        Args:
+            coroutine: Coroutine to run, e.g. from analyze_pdf_async
+
+        Returns:
+            The coroutine's result
+        """
+        with self._loop_lock:
+            task = self._loop.create_task(coroutine)
+            try:
+                return self._loop.run_until_complete(task)
+            except BaseException:
+                self._cancel_pending_tasks()
+                raise
+
+    def _cancel_pending_tasks(self) -> None:
+        """Cancel all tasks on the analyzer's loop and wait for them to finish."""
+        pending = asyncio.all_tasks(self._loop)
+        if not pending:
+            return
+
+        for task in pending:
+            task.cancel()
+
+        self._loop.run_until_complete(
+            asyncio.gather(*pending, return_exceptions=True)
+        )
 
     def analyze_pdf(
         self,
-        pdf_bytes: bytes,
+        pdf_path: str,
         filename: str,
-        prompt: str
+        prompt: str,
+        column_names: Optional[List[str]] = None
     ) -> Tuple[bool, Dict[str, Any], Optional[str]]:
         """
         Analyze a PDF file using Gemini API.
 
+        Blocking wrapper around analyze_pdf_async for single-file use.
+
         Args:
-            pdf_bytes: PDF file content as bytes
+            pdf_path: Path to the PDF file on disk
             filename: Original filename (for error reporting)
             prompt: Analysis prompt to send to Gemini
+            column_names: Output column names; when given, Gemini is asked
+                          for JSON matching a schema with these keys
 
         Returns:
             Tuple of (success, result_dict, error_message)
@@ -59,24 +169,135 @@ class GeminiPDFAnalyzer:
             - result_dict: Parsed JSON response or {"Raw Response": text} on parse failure
             - error_message: Error description if success is False, None otherwise
         """
-        uploaded_file = None
-        temp_file_path = None
+        return self.run(
+            self.analyze_pdf_async(pdf_path, filename, prompt, column_names)
+        )
+
+    async def analyze_pdf_async(
+        self,
+        pdf_path: str,
+        filename: str,
+        prompt: str,
+        column_names: Optional[List[str]] = None,
+        on_progress: Optional[Callable[[int], None]] = None
+    ) -> Tuple[bool, Dict[str, Any], Optional[str]]:
+        """
+        Analyze a PDF file using the async Gemini client.
+
+        Safe to run concurrently for many files; requests are paced by
+        the analyzer's RateLimiter without blocking the event loop.
+        Results for a PDF already analyzed with the same prompt, columns
+        and model are returned from the response cache, and a PDF whose
+        identical content is still being analyzed waits for that result.
+        The file is read in a worker thread; PDFs too large to send inline
+        are uploaded straight from disk and never held in memory.
+
+        Args:
+            pdf_path: Path to the PDF file on disk
+            filename: Original filename (for error reporting)
+            prompt: Analysis prompt to send to Gemini
+            column_names: Output column names for the JSON response schema
+            on_progress: Optional callback receiving the number of response
+                         characters streamed so far
+
+        Returns:
+            Tuple of (success, result_dict, error_message), as for analyze_pdf
+        """
+        try:
+            pdf_bytes, pdf_digest, page_count = await asyncio.to_thread(_load_pdf, pdf_path)
+        except Exception as e:
+            error_msg = f"Error analyzing {filename}: {str(e)}"
+            return False, {}, error_msg
+
+        cache_key = self._cache_key(pdf_digest, prompt, column_names)
+
+        # Identical content is already being analyzed: share its outcome
+        in_flight = self._in_flight.get(cache_key)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        in_flight = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = in_flight
 
         try:
-            # Create temporary file for upload
-            temp_file_path = self._write_temp_pdf(pdf_bytes, filename)
+            outcome = await self._analyze_loaded_pdf(
+                pdf_path,
+                pdf_bytes,
+                page_count,
+                filename,
+                prompt,
+                column_names,
+                cache_key,
+                on_progress
+            )
+            in_flight.set_result(outcome)
+            return outcome
+
+        finally:
+            del self._in_flight[cache_key]
+            if not in_flight.done():
+                in_flight.cancel()
+
+    async def _analyze_loaded_pdf(
+        self,
+        pdf_path: str,
+        pdf_bytes: Optional[bytes],
+        page_count: int,
+        filename: str,
+        prompt: str,
+        column_names: Optional[List[str]],
+        cache_key: str,
+        on_progress: Optional[Callable[[int], None]]
+    ) -> Tuple[bool, Dict[str, Any], Optional[str]]:
+        """
+        Analyze a PDF already loaded by _load_pdf, using the response cache.
+
+        Args:
+            pdf_path: Path to the PDF file on disk
+            pdf_bytes: PDF content, or None if it must be uploaded from disk
+            page_count: Number of pages found in the PDF
+            filename: Original filename (for error reporting)
+            prompt: Analysis prompt to send to Gemini
+            column_names: Output column names for the JSON response schema
+            cache_key: Response cache key from _cache_key
+            on_progress: Optional callback receiving the number of response
+                         characters streamed so far
 
-            # Upload to Gemini Files API
-            uploaded_file = self._upload_file(temp_file_path)
+        Returns:
+            Tuple of (success, result_dict, error_message), as for analyze_pdf
+        """
+        uploaded_file = None
+
+        try:
+            cached_result = self.cache.get(cache_key)
+            if cached_result is not None:
+                return True, cached_result, None
+
+            if pdf_bytes is None:
+                # Too large to send inline; upload from disk via the Files API
+                uploaded_file = await self.client.aio.files.upload(
+                    file=pdf_path,
+                    config=types.UploadFileConfig(mime_type=PDF_MIME_TYPE)
+                )
+                pdf_part = uploaded_file
+            else:
+                pdf_part = types.Part.from_bytes(data=pdf_bytes, mime_type=PDF_MIME_TYPE)
 
             # Generate content with retries
-            response_text = self._generate_content_with_retry(uploaded_file, prompt)
+            response_text = await self._generate_content_with_retry(
+                pdf_part,
+                prompt,
+                config=_build_generation_config(column_names),
+                estimated_tokens=_estimate_tokens(page_count, prompt),
+                on_progress=on_progress
+            )
 
             # Parse JSON response
             result_dict = self._parse_json_response(response_text)
 
-            # Add delay before next request
-            time.sleep(self.api_delay)
+            # Only cache clean parses so unparseable responses get retried
+            if "Raw Response" not in result_dict:
+                self.cache.set(cache_key, result_dict)
 
             return True, result_dict, None
 
@@ -85,67 +306,69 @@ class GeminiPDFAnalyzer:
             return False, {}, error_msg
 
         finally:
-            # Cleanup: delete uploaded file and temp file
+            # Cleanup: delete file uploaded through the Files API in the
+            # background so the next request doesn't wait on it
             if uploaded_file:
-                try:
-                    self.client.files.delete(name=uploaded_file.name)
-                except Exception:
-                    pass  # Ignore cleanup errors
+                self._delete_executor.submit(self._delete_uploaded_file, uploaded_file.name)
 
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except Exception:
-                    pass  # Ignore cleanup errors
-
-    def _write_temp_pdf(self, pdf_bytes: bytes, filename: str) -> str:
+    def _delete_uploaded_file(self, file_name: str) -> None:
         """
-        Write PDF bytes to a temporary file.
+        Delete a file from the Gemini Files API, ignoring errors.
 
         Args:
-            pdf_bytes: PDF content as bytes
-            filename: Original filename (used for temp file naming)
-
-        Returns:
-            Path to temporary file
+            file_name: Name of the uploaded file
         """
-        # Create temp file with .pdf extension
-        suffix = ".pdf"
-        with tempfile.NamedTemporaryFile(
-            mode='wb',
-            suffix=suffix,
-            delete=False
-        ) as temp_file:
-            temp_file.write(pdf_bytes)
-            return temp_file.name
+        try:
+            self.client.files.delete(name=file_name)
+        except Exception:
+            pass  # Ignore cleanup errors
 
-    def _upload_file(self, file_path: str):
+    def _cache_key(
+        self,
+        pdf_digest: str,
+        prompt: str,
+        column_names: Optional[List[str]]
+    ) -> str:
         """
-        Upload a file to Gemini Files API.
+        Build the response cache key for a PDF and request settings.
 
         Args:
-            file_path: Path to PDF file
+            pdf_digest: Hex sha256 digest of the PDF content
+            prompt: Analysis prompt
+            column_names: Output column names
 
         Returns:
-            Uploaded file object
-
-        Raises:
-            Exception: If upload fails
+            Key of the form "<sha256 of PDF>:<sha256 of prompt, columns and model>"
         """
-        path = pathlib.Path(file_path)
-        return self.client.files.upload(file=path)
-
-    def _generate_content_with_retry(
+        request_text = "\n".join([prompt, *(column_names or []), self.model])
+        return (
+            pdf_digest
+            + ":"
+            + hashlib.sha256(request_text.encode()).hexdigest()
+        )
+
+    async def _generate_content_with_retry(
         self,
-        uploaded_file,
-        prompt: str
+        pdf_part,
+        prompt: str,
+        config: Optional[types.GenerateContentConfig] = None,
+        estimated_tokens: int = 0,
+        on_progress: Optional[Callable[[int], None]] = None
     ) -> str:
         """
-        Generate content from Gemini with retry logic.
+        Stream content from Gemini with retry logic.
+
+        Each attempt waits for the rate limiter first. Rate-limit errors
+        shrink the limiter's concurrency and honor the server's retry
+        delay; other errors back off exponentially with jitter.
 
         Args:
-            uploaded_file: File object from Files API
+            pdf_part: Inline PDF Part, or file object from Files API
             prompt: Analysis prompt
+            config: Optional generation config (e.g. JSON response schema)
+            estimated_tokens: Estimated input tokens, for the token quota
+            on_progress: Optional callback receiving the number of response
+                         characters streamed so far
 
         Returns:
             Response text from Gemini
@@ -156,52 +379,74 @@ class GeminiPDFAnalyzer:
         last_exception = None
 
         for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated_tokens)
             try:
-                response = self.client.models.generate_content(
+                stream = await self.client.aio.models.generate_content_stream(
                     model=self.model,
-                    contents=[uploaded_file, prompt]
+                    contents=[pdf_part, prompt],
+                    config=config
                 )
 
-                # Extract text from response
-                if hasattr(response, 'text'):
-                    return response.text
-                elif hasattr(response, 'parts'):
-                    return ''.join(part.text for part in response.parts if hasattr(part, 'text'))
-                else:
-                    raise ValueError("Unexpected response format from Gemini")
+                # Collect chunks and join once at the end
+                text_chunks = []
+                received_chars = 0
+                async for chunk in stream:
+                    chunk_text = _extract_text(chunk)
+                    if not chunk_text:
+                        continue
+                    text_chunks.append(chunk_text)
+                    received_chars += len(chunk_text)
+                    if on_progress:
+                        on_progress(received_chars)
+
+                self.limiter.record_success()
+                return ''.join(text_chunks)
 
             except Exception as e:
                 last_exception = e
-                if attempt < self.max_retries:
-                    # Wait before retry (exponential backoff)
-                    wait_time = (attempt + 1) * 2
-                    time.sleep(wait_time)
-                else:
+                retry_after = None
+
+                if _is_rate_limit_error(e):
+                    retry_after = _retry_after_seconds(e)
+                    self.limiter.record_rate_limited(retry_after or 0.0)
+
+                if attempt >= self.max_retries:
                     raise last_exception
 
+            finally:
+                # Free the slot before backing off so other files can proceed
+                self.limiter.release()
+
+            await asyncio.sleep(_backoff_delay(attempt, retry_after))
+
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """
-        Parse JSON from Gemini response, handling markdown code fences.
+        Parse JSON from a Gemini response.
+
+        JSON mode output is bare JSON; responses requested without a schema
+        may still be wrapped in a markdown code fence, which is stripped.
 
         Args:
             response_text: Raw response text from Gemini
 
         Returns:
-            Parsed JSON as dictionary, or {"Raw Response": text} if parsing fails
+            Parsed JSON as dictionary, or {"Raw Response": text} if parsing
+            fails (e.g. a truncated response or no schema was requested)
         """
-        # Remove markdown code fences if present
         cleaned_text = response_text.strip()
 
-        # Pattern: ```json ... ``` or ``` ... ```
-        json_pattern = r'^```(?:json)?\s*\n(.*?)\n```$'
-        match = re.match(json_pattern, cleaned_text, re.DOTALL)
+        # Strip ```json ... ``` or ``` ... ``` with prefix/suffix checks
+        if cleaned_text.startswith("```"):
+            cleaned_text = cleaned_text[cleaned_text.find("\n") + 1:]
+            if cleaned_text.endswith("```"):
+                cleaned_text = cleaned_text[:-3].rstrip()
 
-        if match:
-            cleaned_text = match.group(1).strip()
-
-        # Try to parse JSON
         try:
-            result = json.loads(cleaned_text)
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            if orjson is not None:
+                result = orjson.loads(cleaned_text)
+            else:
+                result = json.loads(cleaned_text)
             if isinstance(result, dict):
                 return result
             else:
@@ -212,6 +457,197 @@ class GeminiPDFAnalyzer:
             return {"Raw Response": response_text}
 
 
+def _build_generation_config(
+    column_names: Optional[List[str]]
+) -> Optional[types.GenerateContentConfig]:
+    """
+    Build a JSON-mode generation config with one string field per column.
+
+    Args:
+        column_names: Output column names, possibly including "Document Name"
+
+    Returns:
+        GenerateContentConfig enforcing the response schema, or None if
+        there are no output columns to request
+    """
+    output_columns = get_output_columns(column_names or [])
+    if not output_columns:
+        return None
+
+    response_schema = {
+        "type": "object",
+        "properties": {col: {"type": "string"} for col in output_columns},
+        "required": output_columns
+    }
+
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=response_schema
+    )
+
+
+def _extract_text(response) -> str:
+    """
+    Extract text from a Gemini response or streamed response chunk.
+
+    Args:
+        response: GenerateContentResponse object
+
+    Returns:
+        Response text, or an empty string if the chunk carries no text
+    """
+    if getattr(response, 'text', None):
+        return response.text
+    elif hasattr(response, 'parts'):
+        return ''.join(part.text for part in response.parts if getattr(part, 'text', None))
+    else:
+        return ''
+
+
+def _load_pdf(pdf_path: str) -> Tuple[Optional[bytes], str, int]:
+    """
+    Read or scan a PDF file for analysis.
+
+    PDFs small enough to send inline are read whole. Larger ones are
+    hashed in chunks so their content is never held in memory.
+
+    Args:
+        pdf_path: Path to the PDF file on disk
+
+    Returns:
+        Tuple of (pdf_bytes, sha256_hex_digest, page_count), where
+        pdf_bytes is None for PDFs above INLINE_PDF_MAX_BYTES
+    """
+    if os.path.getsize(pdf_path) <= INLINE_PDF_MAX_BYTES:
+        with open(pdf_path, 'rb') as f:
+            pdf_bytes = f.read()
+        return pdf_bytes, hashlib.sha256(pdf_bytes).hexdigest(), _count_pages(pdf_bytes)
+
+    digest = hashlib.sha256()
+    page_count = 0
+    with open(pdf_path, 'rb') as f:
+        # Page markers split across a chunk boundary are missed, which
+        # only makes the token estimate slightly low
+        while chunk := f.read(PDF_SCAN_CHUNK_SIZE):
+            digest.update(chunk)
+            page_count += _count_pages(chunk)
+
+    return None, digest.hexdigest(), page_count
+
+
+def _count_pages(pdf_data: bytes) -> int:
+    """
+    Count page objects in PDF content.
+
+    Only uncompressed page objects are seen, so PDFs using compressed
+    object streams may report zero pages.
+
+    Args:
+        pdf_data: PDF content, or a chunk of it
+
+    Returns:
+        Number of page objects found
+    """
+    return len(_PDF_PAGE_PATTERN.findall(pdf_data))
+
+
+def _estimate_tokens(page_count: int, prompt: str) -> int:
+    """
+    Roughly estimate the input tokens for a PDF and prompt.
+
+    Args:
+        page_count: Number of pages found in the PDF (at least one is assumed)
+        prompt: Analysis prompt
+
+    Returns:
+        Estimated input token count
+    """
+    return max(1, page_count) * TOKENS_PER_PDF_PAGE + len(prompt) // 4
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """
+    Check whether an exception is a 429 / RESOURCE_EXHAUSTED response.
+
+    Args:
+        error: Exception raised by the Gemini client
+
+    Returns:
+        True if the error indicates the quota was exceeded
+    """
+    if getattr(error, 'code', None) == 429:
+        return True
+
+    if getattr(error, 'status', None) == 'RESOURCE_EXHAUSTED':
+        return True
+
+    return 'RESOURCE_EXHAUSTED' in str(error)
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Extract the server-requested retry delay from a rate-limit error.
+
+    Checks the Retry-After response header first, then the RetryInfo
+    entry in the error details (e.g. {"retryDelay": "34s"}).
+
+    Args:
+        error: Exception raised by the Gemini client
+
+    Returns:
+        Delay in seconds, or None if the server did not specify one
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass  # HTTP-date form; fall through to error details
+
+    details = getattr(error, 'details', None)
+    if isinstance(details, dict):
+        details = details.get('error', details).get('details', [])
+
+    for detail in details or []:
+        if isinstance(detail, dict) and 'retryDelay' in detail:
+            match = _RETRY_DELAY_PATTERN.match(str(detail['retryDelay']))
+            if match:
+                return float(match.group(1))
+
+    return None
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """
+    Compute a jittered delay before the next retry attempt.
+
+    Args:
+        attempt: Zero-based index of the attempt that just failed
+        retry_after: Server-requested delay in seconds, if any
+
+    Returns:
+        Delay in seconds
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 1)
+
+    # Full jitter: spread retries so concurrent failures don't sync up
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** attempt))
+
+
+def clear_response_cache(cache_dir: str = CACHE_DIR) -> None:
+    """
+    Remove all cached Gemini responses.
+
+    Args:
+        cache_dir: Directory of the response cache
+    """
+    with diskcache.Cache(cache_dir) as cache:
+        cache.clear()
+
+
 def validate_api_key() -> Tuple[bool, Optional[str]]:
     """
     Validate that GEMINI_API_KEY environment variable is set.
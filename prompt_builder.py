@@ -2,27 +2,31 @@
 Prompt construction module for Gemini PDF analysis.
 
 This module handles building structured prompts that instruct Gemini
-to return JSON-formatted responses with specific fields.
+which fields to return. JSON output itself is enforced by the response
+schema set in gemini_client.
 """
 
-from typing import List
+import functools
+from typing import List, Sequence, Tuple
 
 
-def build_analysis_prompt(user_prompt: str, column_names: List[str]) -> str:
+@functools.lru_cache(maxsize=64)
+def build_analysis_prompt(user_prompt: str, column_names: Tuple[str, ...]) -> str:
     """
     Construct the full prompt for Gemini by combining user instructions
     with JSON output formatting requirements.
 
+    Results are memoized, so column_names must be a hashable tuple.
+
     Args:
         user_prompt: The user's analysis instructions
-        column_names: List of column names (excluding "Document Name")
+        column_names: Tuple of column names (excluding "Document Name")
                      that should be returned in the JSON response
 
     Returns:
         Complete prompt string to send to Gemini
     """
-    # Filter out "Document Name" as it's auto-populated
-    output_columns = [col for col in column_names if col.lower() != "document name"]
+    output_columns = get_output_columns(column_names)
 
     if not output_columns:
         # If no custom columns defined, just return the user prompt
@@ -34,13 +38,25 @@ def build_analysis_prompt(user_prompt: str, column_names: List[str]) -> str:
 
 Based on your analysis, return your findings as a JSON object with exactly these keys: {column_list}
 
-Each value should be a string. If information for a field is not found, use "N/A".
-
-Return ONLY the JSON object, no additional text or markdown formatting."""
+Each value should be a string. If information for a field is not found, use "N/A"."""
 
     return user_prompt + structured_instruction
 
 
+def get_output_columns(column_names: Sequence[str]) -> List[str]:
+    """
+    Return the columns Gemini should fill in.
+
+    Args:
+        column_names: List of column names, possibly including "Document Name"
+
+    Returns:
+        Column names excluding "Document Name", which is auto-populated
+    """
+    return [col for col in column_names if col.lower() != "document name"]
+
+
+@functools.cache
 def get_default_prompt() -> str:
     """
     Return a default example prompt for users to start with.
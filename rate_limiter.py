@@ -0,0 +1,153 @@
+"""
+Rate limiting module for Gemini API requests.
+
+Provides a sliding-window limiter for requests and tokens per minute,
+combined with additive-increase/multiplicative-decrease (AIMD) control
+of the number of requests allowed in flight.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+
+# Google AI default quotas
+DEFAULT_REQUESTS_PER_MINUTE = 60
+DEFAULT_TOKENS_PER_MINUTE = 100_000
+DEFAULT_MAX_CONCURRENCY = 8
+
+# AIMD parameters
+CONCURRENCY_INCREASE = 1.0
+CONCURRENCY_DECREASE_FACTOR = 0.5
+
+# How long to wait before re-checking when only the concurrency limit blocks
+_CONCURRENCY_POLL_INTERVAL = 0.05
+
+_WINDOW_SECONDS = 60.0
+
+
+class RateLimiter:
+    """Sliding-window RPM/TPM limiter with AIMD concurrency control."""
+
+    def __init__(
+        self,
+        requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = DEFAULT_TOKENS_PER_MINUTE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    ):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            requests_per_minute: Maximum requests started in any 60 second window
+            tokens_per_minute: Maximum estimated tokens sent in any 60 second window
+            max_concurrency: Upper bound on requests in flight at once
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.concurrency_limit = float(max_concurrency)
+
+        self._request_times: Deque[float] = deque()
+        self._token_usage: Deque[Tuple[float, int]] = deque()
+        self._tokens_in_window = 0
+        self._in_flight = 0
+        self._blocked_until = 0.0
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """
+        Wait until a request may start, then reserve capacity for it.
+
+        Every acquire must be paired with a release once the request ends.
+
+        Args:
+            estimated_tokens: Estimated input tokens for the request
+        """
+        while True:
+            wait_time = self._time_until_available(estimated_tokens)
+            if wait_time <= 0:
+                break
+            await asyncio.sleep(wait_time)
+
+        # No await between the check above and this reservation, so
+        # concurrent tasks on the same event loop cannot overbook.
+        now = time.monotonic()
+        self._request_times.append(now)
+        self._token_usage.append((now, estimated_tokens))
+        self._tokens_in_window += estimated_tokens
+        self._in_flight += 1
+
+    def release(self) -> None:
+        """Mark a previously acquired request as finished."""
+        self._in_flight = max(0, self._in_flight - 1)
+
+    def record_success(self) -> None:
+        """Additively grow the concurrency limit after a successful request."""
+        self.concurrency_limit = min(
+            float(self.max_concurrency),
+            self.concurrency_limit + CONCURRENCY_INCREASE
+        )
+
+    def record_rate_limited(self, retry_after: float = 0.0) -> None:
+        """
+        Multiplicatively shrink the concurrency limit after a 429 response.
+
+        Args:
+            retry_after: Seconds the server asked us to wait, if known
+        """
+        self.concurrency_limit = max(
+            1.0,
+            self.concurrency_limit * CONCURRENCY_DECREASE_FACTOR
+        )
+
+        if retry_after > 0:
+            self._blocked_until = max(
+                self._blocked_until,
+                time.monotonic() + retry_after
+            )
+
+    def _time_until_available(self, estimated_tokens: int) -> float:
+        """
+        Compute how long to wait before a request may start.
+
+        Args:
+            estimated_tokens: Estimated input tokens for the request
+
+        Returns:
+            Seconds to wait, or a value <= 0 if the request may start now
+        """
+        now = time.monotonic()
+        self._prune(now)
+
+        wait_times = [self._blocked_until - now]
+
+        if self._in_flight >= int(self.concurrency_limit):
+            wait_times.append(_CONCURRENCY_POLL_INTERVAL)
+
+        if len(self._request_times) >= self.requests_per_minute:
+            wait_times.append(self._request_times[0] + _WINDOW_SECONDS - now)
+
+        # A single request larger than the whole budget is let through
+        # once the window is empty rather than blocking forever.
+        if (self._token_usage
+                and self._tokens_in_window + estimated_tokens > self.tokens_per_minute):
+            wait_times.append(self._token_usage[0][0] + _WINDOW_SECONDS - now)
+
+        return max(wait_times)
+
+    def _prune(self, now: float) -> None:
+        """
+        Drop request and token records older than the sliding window.
+
+        Args:
+            now: Current monotonic time
+        """
+        cutoff = now - _WINDOW_SECONDS
+
+        while self._request_times and self._request_times[0] <= cutoff:
+            self._request_times.popleft()
+
+        while self._token_usage and self._token_usage[0][0] <= cutoff:
+            _, tokens = self._token_usage.popleft()
+            self._tokens_in_window -= tokens